@@ -1,72 +1,1039 @@
 #!/usr/bin/env python3
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import os
 import importlib
+import importlib.util
 import json
-import shodan
+import csv
+import gzip
+import hashlib
+import ipaddress
+import re
+import socket
+import sys
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
 from colorama import init, Fore, Style
 
 init()
+_IMPORT_FINISHED = time.perf_counter()
+
+def _shodan():
+    """Import the Shodan client on first use to keep cold start fast"""
+    import shodan
+    return shodan
+
+class ModuleIndex:
+    """
+    Token and trigram inverted index over module metadata.
+
+    Every module is indexed by its key, name, description, query and
+    MODULE_INFO text. Tokens map to the modules containing them, and
+    trigrams map to tokens so misspelled words still find candidates
+    without scanning the whole vocabulary.
+    """
+
+    FIELD_WEIGHTS = {'key': 3.0, 'name': 3.0, 'description': 2.0, 'query': 1.5, 'info': 1.0}
+
+    def __init__(self):
+        self.postings = {}
+        self.trigrams = {}
+
+    @staticmethod
+    def tokenize(text):
+        return [t for t in re.split(r'[^\w]+', str(text).lower().replace('_', ' ')) if t]
+
+    @staticmethod
+    def grams(token):
+        padded = f" {token} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @classmethod
+    def build(cls, modules, infos=None):
+        index = cls()
+        infos = infos or {}
+        for key, module in modules.items():
+            fields = {
+                'key': key,
+                'name': getattr(module, 'name', ''),
+                'description': getattr(module, 'description', ''),
+                'query': getattr(module, 'query', ''),
+                'info': infos.get(key, ''),
+            }
+            for field, text in fields.items():
+                weight = cls.FIELD_WEIGHTS[field]
+                for token in cls.tokenize(text):
+                    entry = index.postings.setdefault(token, {})
+                    if entry.get(key, 0) < weight:
+                        entry[key] = weight
+        for token in index.postings:
+            for gram in cls.grams(token):
+                index.trigrams.setdefault(gram, set()).add(token)
+        return index
+
+    def _candidates(self, term):
+        """Yield (token, similarity) for vocabulary tokens close to term"""
+        if term in self.postings:
+            yield term, 1.0
+        term_grams = self.grams(term)
+        shared = {}
+        for gram in term_grams:
+            for token in self.trigrams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        for token, common in shared.items():
+            if token == term:
+                continue
+            if token.startswith(term):
+                yield token, 0.8
+            elif term in token:
+                yield token, 0.6
+            else:
+                similarity = max(common / len(term_grams | self.grams(token)),
+                                 1 - self.distance(term, token) / max(len(term), len(token)))
+                if similarity >= 0.6:
+                    yield token, similarity * 0.7
+
+    @staticmethod
+    def distance(a, b):
+        """Levenshtein distance between two short tokens"""
+        previous = list(range(len(b) + 1))
+        for i, ca in enumerate(a, 1):
+            current = [i]
+            for j, cb in enumerate(b, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+            previous = current
+        return previous[-1]
+
+    def search(self, query, limit=None):
+        terms = self.tokenize(query)
+        if not terms:
+            return sorted({key for entry in self.postings.values() for key in entry})[:limit]
+        scores = {}
+        for term in terms:
+            best = {}
+            for token, similarity in self._candidates(term):
+                for key, weight in self.postings[token].items():
+                    best[key] = max(best.get(key, 0), weight * similarity)
+            for key, score in best.items():
+                scores[key] = scores.get(key, 0) + score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [key for key, _ in ranked[:limit]]
+
+class CreditBudgetError(Exception):
+    pass
+
+class CreditLedger:
+    """
+    Local record of query credits spent per key, module and day.
+
+    The balance of each key is estimated from the last api.info() result
+    minus everything spent since, so info() only has to be called again
+    once the reconcile interval has elapsed. Keys are stored as short
+    hashes, never in clear text.
+
+    Spending is written back at most every SAVE_INTERVAL seconds and by
+    flush() at the end of a run, and per-day totals older than
+    days_retention days are dropped on save.
+    """
+
+    PAGE_SIZE = 100
+    SAVE_INTERVAL = 5.0
+
+    def __init__(self, path, reconcile_interval=3600, run_budget=None, daily_budget=None, days_retention=90):
+        self.path = path
+        self.reconcile_interval = reconcile_interval
+        self.run_budget = run_budget
+        self.daily_budget = daily_budget
+        self.days_retention = days_retention
+        self.run_spent = 0
+        self.run_module = None
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self.data = {'keys': {}, 'days': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def key_id(api_key):
+        return hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:12]
+
+    @staticmethod
+    def today():
+        return time.strftime('%Y-%m-%d')
+
+    def save(self):
+        cutoff = (datetime.now() - timedelta(days=self.days_retention)).strftime('%Y-%m-%d')
+        for day in [d for d in self.data['days'] if d < cutoff]:
+            del self.data['days'][day]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    def flush(self):
+        if self.dirty:
+            self.save()
+
+    def start_run(self, module_name):
+        self.run_module = module_name
+        self.run_spent = 0
+
+    def balance(self, api_key):
+        """Estimated credits left, or None when a reconcile is due"""
+        entry = self.data['keys'].get(self.key_id(api_key))
+        if not entry or time.time() - entry['reconciled_at'] > self.reconcile_interval:
+            return None
+        return entry['credits'] - entry['spent']
+
+    def reconcile(self, api_key, credits):
+        self.data['keys'][self.key_id(api_key)] = {'credits': credits, 'spent': 0, 'reconciled_at': time.time()}
+        self.save()
+
+    def spent_today(self, module_name=None):
+        day = self.data['days'].get(self.today(), {})
+        if module_name is not None:
+            return day.get(module_name, 0)
+        return sum(day.values())
+
+    def estimate(self, limit=None):
+        if limit:
+            return max(1, -(-limit // self.PAGE_SIZE))
+        return 1
+
+    def check(self, api_key, cost):
+        if self.run_budget is not None and self.run_spent + cost > self.run_budget:
+            raise CreditBudgetError(f"run budget exceeded ({self.run_spent}+{cost} > {self.run_budget})")
+        if self.daily_budget is not None and self.spent_today() + cost > self.daily_budget:
+            raise CreditBudgetError(f"daily budget exceeded ({self.spent_today()}+{cost} > {self.daily_budget})")
+        balance = self.balance(api_key)
+        if balance is not None and balance < cost:
+            raise CreditBudgetError(f"estimated balance too low ({balance} < {cost})")
+
+    def record(self, api_key, cost):
+        entry = self.data['keys'].get(self.key_id(api_key))
+        if entry:
+            entry['spent'] += cost
+        day = self.data['days'].setdefault(self.today(), {})
+        module_name = self.run_module or 'direct'
+        day[module_name] = day.get(module_name, 0) + cost
+        self.run_spent += cost
+        self.dirty = True
+        if time.monotonic() - self.saved_at >= self.SAVE_INTERVAL:
+            self.save()
+
+class LedgerClient:
+    """
+    Shodan client proxy that checks budgets and books every search.
+
+    When the ledger estimate is older than the reconcile interval the
+    balance is refreshed through api.info() before the next search, so
+    the balance check is never skipped.
+
+    All requests issued through search() and host() are spaced at least
+    min_interval seconds apart, which keeps batch work under the API
+    rate limit. succeeded/failed count searches so callers can tell an
+    empty result from a failed one (blocked counts the failures caused by
+    a credit budget), last_total holds the match count Shodan reported for
+    the latest search, and an optional on_request callback receives the
+    duration of every API request.
+    """
+
+    def __init__(self, api, api_key, ledger, min_interval=1.0):
+        self._api = api
+        self._api_key = api_key
+        self._ledger = ledger
+        self._min_interval = min_interval
+        self._last_request = 0
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+        self.blocked = 0
+        self.last_total = None
+        self.on_request = None
+
+    def _throttle(self):
+        with self._lock:
+            wait = self._last_request + self._min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+
+    def search(self, query, page=1, limit=None, **kwargs):
+        try:
+            if self._ledger.balance(self._api_key) is None:
+                self._throttle()
+                self._ledger.reconcile(self._api_key, self._api.info().get('query_credits', 0))
+            self._ledger.check(self._api_key, self._ledger.estimate(limit))
+            if limit is not None:
+                kwargs['limit'] = limit
+            self._throttle()
+            results = self._timed(self._api.search, query, page=page, **kwargs)
+        except Exception as e:
+            self.failed += 1
+            if isinstance(e, CreditBudgetError):
+                self.blocked += 1
+            raise
+        self.succeeded += 1
+        self.last_total = results.get('total')
+        pages = -(-len(results.get('matches', [])) // CreditLedger.PAGE_SIZE)
+        self._ledger.record(self._api_key, max(1, pages))
+        return results
+
+    def host(self, ips, **kwargs):
+        self._throttle()
+        return self._timed(self._api.host, ips, **kwargs)
+
+    def _timed(self, request, *args, **kwargs):
+        """Call request and report its duration to on_request(seconds, ok) if set"""
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = request(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            if self.on_request:
+                self.on_request(time.perf_counter() - started, ok)
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+HOST_FIELDS = ('ip', 'port', 'timestamp', 'org', 'country', 'city', 'product', 'hostnames', 'module')
+
+def host_record(record, module_name=''):
+    """
+    Map a raw Shodan match or a module result dict onto the common host record.
+
+    Modules store 'ip' and a 'Country/City' location string while raw
+    matches carry 'ip_str' and a nested location; both end up with the
+    fields listed in HOST_FIELDS.
+    """
+    if not isinstance(record, dict):
+        return None
+    location = record.get('location', {})
+    if isinstance(location, dict):
+        country = location.get('country_name') or record.get('country_name')
+        city = location.get('city') or record.get('city')
+    else:
+        country, _, city = str(location).partition('/')
+    return {
+        'ip': record.get('ip_str') or record.get('ip') or '',
+        'port': record.get('port') or 0,
+        'timestamp': record.get('timestamp') or '',
+        'org': record.get('org') or 'Unknown',
+        'country': country or 'Unknown',
+        'city': city or 'Unknown',
+        'product': record.get('product') or record.get('server') or 'Unknown',
+        'hostnames': list(record.get('hostnames') or []),
+        'module': record.get('module') or module_name,
+    }
+
+def parse_timestamp(value):
+    """Parse a Shodan ISO timestamp into a datetime, or None when it is missing or malformed"""
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+class DictColumn:
+    """Dictionary-encoded string column: array of codes plus the distinct values"""
+
+    def __init__(self, values=None, lookup=None, codes=None):
+        self.values = values if values is not None else []
+        self.lookup = lookup if lookup is not None else {}
+        self.codes = codes if codes is not None else array('I')
+
+    def append(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def take(self, rows):
+        codes = self.codes
+        return DictColumn(self.values, self.lookup, array('I', [codes[i] for i in rows]))
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def sort_key(self):
+        rank = {code: pos for pos, code in enumerate(sorted(range(len(self.values)), key=self.values.__getitem__))}
+        ranks = [rank[code] for code in range(len(self.values))]
+        codes = self.codes
+        return lambda row: ranks[codes[row]]
+
+    def counts(self):
+        counted = Counter(self.codes)
+        return [(self.values[code], n) for code, n in counted.most_common()]
+
+    def match(self, op, value):
+        """Row indices whose value satisfies op, evaluated once per distinct value"""
+        test = ResultTable.COMPARE[op]
+        wanted = {code for code, item in enumerate(self.values) if test(item.lower(), value.lower())}
+        return [row for row, code in enumerate(self.codes) if code in wanted]
+
+class ResultTable:
+    """
+    Columnar copy of the last result set for interactive analysis.
+
+    ip, port and timestamp live in typed arrays (IPv4 as an unsigned int,
+    IPv6 rows keep their text in a side map), text fields are dictionary
+    encoded so grouping and filtering work on integer codes. Operations
+    are plain loops over these arrays; the ip column sorts IPv4 before
+    IPv6 and only compares addresses of the same family.
+    """
+
+    TYPED = {'ip': 'L', 'port': 'H', 'timestamp': 'd'}
+    ENCODED = ('org', 'country', 'city', 'product', 'module')
+    COMPARE = {
+        '=': lambda a, b: a == b,
+        '!=': lambda a, b: a != b,
+        '>': lambda a, b: a > b,
+        '<': lambda a, b: a < b,
+        '>=': lambda a, b: a >= b,
+        '<=': lambda a, b: a <= b,
+        '~': lambda a, b: b in a,
+    }
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, code in self.TYPED.items()}
+        self.columns.update({name: DictColumn() for name in self.ENCODED})
+        self.ipv6 = {}
+
+    @classmethod
+    def from_records(cls, records, module_name=''):
+        table = cls()
+        ips, ports, times = table.columns['ip'], table.columns['port'], table.columns['timestamp']
+        encoded = [(table.columns[name], name) for name in cls.ENCODED]
+        for record in records:
+            host = host_record(record, module_name)
+            if host is None:
+                continue
+            ips.append(table._ip_value(host['ip'], len(ips)))
+            ports.append(int(host['port']) & 0xFFFF)
+            times.append(cls.parse_time(host['timestamp']))
+            for column, name in encoded:
+                column.append(host[name])
+        return table
+
+    def _ip_value(self, ip, row):
+        try:
+            return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        except (OSError, TypeError):
+            self.ipv6[row] = ip
+            return 0
+
+    @staticmethod
+    def parse_time(value):
+        moment = parse_timestamp(value)
+        return moment.timestamp() if moment else 0.0
+
+    def __len__(self):
+        return len(self.columns['port'])
+
+    def ip(self, row):
+        if row in self.ipv6:
+            return self.ipv6[row]
+        return str(ipaddress.IPv4Address(self.columns['ip'][row]))
+
+    def _ip_key(self, row):
+        """(family, value) of a row's address; unparseable text sorts last"""
+        if row not in self.ipv6:
+            return 4, self.columns['ip'][row]
+        try:
+            return 6, int(ipaddress.IPv6Address(self.ipv6[row]))
+        except ValueError:
+            return 7, 0
+
+    def take(self, rows):
+        table = ResultTable()
+        for name, column in self.columns.items():
+            if isinstance(column, DictColumn):
+                table.columns[name] = column.take(rows)
+            else:
+                table.columns[name] = array(column.typecode, [column[i] for i in rows])
+        if self.ipv6:
+            table.ipv6 = {new: self.ipv6[old] for new, old in enumerate(rows) if old in self.ipv6}
+        return table
+
+    def sort(self, name, descending=False):
+        column = self.columns[name]
+        if name == 'ip' and self.ipv6:
+            key = self._ip_key
+        else:
+            key = column.sort_key() if isinstance(column, DictColumn) else column.__getitem__
+        return sorted(range(len(self)), key=key, reverse=descending)
+
+    def group(self, name):
+        column = self.columns[name]
+        if isinstance(column, DictColumn):
+            return column.counts()
+        if name == 'ip' and self.ipv6:
+            return Counter(self.ipv6.get(row, value) for row, value in enumerate(column)).most_common()
+        return Counter(column).most_common()
+
+    def where(self, name, op, value):
+        column = self.columns[name]
+        if isinstance(column, DictColumn):
+            return column.match(op, value)
+        test = self.COMPARE[op]
+        if name == 'ip':
+            if op == '~':
+                return [row for row in range(len(self)) if test(self.ip(row), value)]
+            address = ipaddress.ip_address(value)
+            if not self.ipv6:
+                target = int(address)
+                return [row for row, item in enumerate(column) if test(item, target)] if address.version == 4 else []
+            target = (address.version, int(address))
+            keys = (self._ip_key(row) for row in range(len(self)))
+            return [row for row, key in enumerate(keys) if key[0] == target[0] and test(key, target)]
+        if name == 'timestamp':
+            target = self.parse_time(value)
+        else:
+            target = int(value)
+        return [row for row, item in enumerate(column) if test(item, target)]
+
+    def row(self, row):
+        values = {name: self.columns[name][row] for name in self.ENCODED}
+        values.update({'ip': self.ip(row), 'port': self.columns['port'][row]})
+        return values
+
+class ResultExporter:
+    """
+    Row-group writer for the common host record schema.
+
+    Records are buffered and flushed every row_group_size rows, so exports
+    can be fed while a module is still streaming. 'csv' and 'csv.gz' need
+    only the standard library; 'parquet' requires the optional pyarrow
+    package and writes dictionary-encoded, zstd-compressed columns.
+    """
+
+    FORMATS = ('csv', 'csv.gz', 'parquet')
+
+    def __init__(self, path, fmt='csv', row_group_size=10000, module_name=''):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"unsupported export format: {fmt}")
+        self.path = path
+        self.format = fmt
+        self.row_group_size = row_group_size
+        self.module_name = module_name
+        self.buffer = []
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        if fmt == 'parquet':
+            self._open_parquet()
+        else:
+            opener = gzip.open if fmt == 'csv.gz' else open
+            self._file = opener(path, 'wt', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(HOST_FIELDS)
+
+    def _open_parquet(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("parquet export requires the optional 'pyarrow' package")
+        self._pa = pyarrow
+        text = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        self._schema = pyarrow.schema([
+            ('ip', pyarrow.string()),
+            ('port', pyarrow.uint16()),
+            ('timestamp', pyarrow.timestamp('us')),
+            ('org', text),
+            ('country', text),
+            ('city', text),
+            ('product', text),
+            ('hostnames', pyarrow.list_(pyarrow.string())),
+            ('module', text),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema, compression='zstd')
+
+    def write(self, record):
+        host = host_record(record, self.module_name)
+        if host is None:
+            return
+        self.buffer.append(host)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.format == 'parquet':
+            columns = {name: [host[name] for host in self.buffer] for name in HOST_FIELDS}
+            columns['port'] = [int(port) & 0xFFFF for port in columns['port']]
+            columns['timestamp'] = [parse_timestamp(value) for value in columns['timestamp']]
+            self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        else:
+            for host in self.buffer:
+                self._writer.writerow([';'.join(host[name]) if name == 'hostnames' else host[name] for name in HOST_FIELDS])
+        self.rows += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.format == 'parquet':
+            self._writer.close()
+        else:
+            self._file.close()
+        return self.rows
+
+class RollupStore:
+    """
+    Incremental daily and hourly exposure aggregates per module.
+
+    Each successful run updates the buckets of its day and hour: runs and
+    hits accumulate, new and resolved hosts (overall and per country) are
+    computed against the host set of the previous run, and the
+    country/org/port breakdowns hold the snapshot of the latest run in
+    that bucket. Dashboards read these
+    buckets instead of re-parsing the raw result files.
+
+    hits and active use the match total reported by Shodan when it is
+    known. A partial run (cut at max_results) only sees part of the hosts,
+    so it skips new/resolved, keeps the previous host set and is counted
+    in the bucket's 'partial' field.
+
+    The buckets of all modules share one small file that is read on first
+    use; the host set of each module lives in its own file in hosts_dir and
+    is only read and written when that module is committed.
+    """
+
+    DIMENSIONS = ('country', 'org', 'port')
+
+    def __init__(self, path, hourly_retention_days=14, hosts_dir=None):
+        self.path = path
+        self.hosts_dir = hosts_dir or os.path.splitext(path)[0] + '_hosts'
+        self.hourly_retention_days = hourly_retention_days
+        self.data = None
+
+    def load(self):
+        """Return the bucket data, reading the file on first use"""
+        if self.data is None:
+            self.data = self._read(self.path, {'modules': {}})
+        return self.data
+
+    @staticmethod
+    def _read(path, default):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _hosts_file(self, module_name):
+        return os.path.join(self.hosts_dir, f"{module_name}.json")
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.load(), f, ensure_ascii=False)
+
+    def begin(self):
+        """Start collecting a run record by record, see add() and commit()"""
+        return {'hosts': {}, 'hits': 0, 'snapshot': {dimension: Counter() for dimension in self.DIMENSIONS}}
+
+    def add(self, run, record, module_name=''):
+        host = host_record(record, module_name)
+        if host is None or not host['ip']:
+            return
+        run['hits'] += 1
+        run['hosts'][f"{host['ip']}:{host['port']}"] = host['country']
+        for dimension, counts in run['snapshot'].items():
+            counts[str(host[dimension])] += 1
+
+    def update(self, module_name, records, when=None, total=None, partial=False):
+        run = self.begin()
+        for record in records:
+            self.add(run, record, module_name)
+        return self.commit(module_name, run, when, total, partial)
+
+    def commit(self, module_name, run, when=None, total=None, partial=False):
+        """Fold a finished run into its buckets; returns (new, resolved) or None for a partial run"""
+        when = when or datetime.now()
+        current = run['hosts']
+        entry = self.load()['modules'].setdefault(module_name, {'daily': {}, 'hourly': {}})
+        previous = self._read(self._hosts_file(module_name), {})
+        new = Counter(country for host, country in current.items() if host not in previous)
+        resolved = Counter(country for host, country in previous.items() if host not in current)
+        for granularity, key in (('daily', when.strftime('%Y-%m-%d')), ('hourly', when.strftime('%Y-%m-%dT%H'))):
+            bucket = entry[granularity].setdefault(key, {'runs': 0, 'hits': 0, 'new': 0, 'resolved': 0})
+            bucket['runs'] += 1
+            bucket['hits'] += run['hits'] if total is None else total
+            bucket['active'] = len(current) if total is None else total
+            if partial:
+                bucket['partial'] = bucket.get('partial', 0) + 1
+            else:
+                bucket['new'] += sum(new.values())
+                bucket['resolved'] += sum(resolved.values())
+                for field, counts in (('new_country', new), ('resolved_country', resolved)):
+                    merged = Counter(bucket.get(field, {}))
+                    merged.update(counts)
+                    bucket[field] = dict(merged)
+            for dimension, counts in run['snapshot'].items():
+                bucket[dimension] = dict(counts)
+        if not partial:
+            os.makedirs(self.hosts_dir, exist_ok=True)
+            with open(self._hosts_file(module_name), 'w', encoding='utf-8') as f:
+                json.dump(current, f, ensure_ascii=False)
+        self._prune(entry, when)
+        self.save()
+        if partial:
+            return None
+        return sum(new.values()), sum(resolved.values())
+
+    def _prune(self, entry, when):
+        cutoff = (when - timedelta(days=self.hourly_retention_days)).strftime('%Y-%m-%dT%H')
+        for key in [k for k in entry['hourly'] if k < cutoff]:
+            del entry['hourly'][key]
+
+    def series(self, module_name, granularity='daily', country=None):
+        """Return (bucket, active, new, resolved, partial runs) rows, optionally for one country"""
+        buckets = self.load()['modules'].get(module_name, {}).get(granularity, {})
+        rows = []
+        for key in sorted(buckets):
+            bucket = buckets[key]
+            if country:
+                rows.append((key, bucket['country'].get(country, 0),
+                             bucket.get('new_country', {}).get(country, 0),
+                             bucket.get('resolved_country', {}).get(country, 0),
+                             bucket.get('partial', 0)))
+            else:
+                rows.append((key, bucket.get('active', 0), bucket['new'], bucket['resolved'], bucket.get('partial', 0)))
+        return rows
+
+    def export(self, path):
+        """Write a dashboard copy of the daily and hourly buckets"""
+        trimmed = {name: {g: entry[g] for g in ('daily', 'hourly')} for name, entry in self.load()['modules'].items()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'generated': datetime.now().isoformat(timespec='seconds'), 'modules': trimmed}, f, ensure_ascii=False)
+
+class HostCache:
+    """
+    On-disk cache of full host records, one gzip JSON file per IP.
+
+    Entries older than ttl seconds are treated as missing. evict() removes
+    the oldest files until the directory fits max_bytes; callers run it
+    once after a batch of writes, since it stats the whole directory.
+    """
+
+    def __init__(self, path, ttl=86400, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _file(self, ip):
+        return os.path.join(self.path, ip.replace(':', '_') + '.json.gz')
+
+    def get(self, ip):
+        path = self._file(ip)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_many(self, hosts):
+        os.makedirs(self.path, exist_ok=True)
+        for ip, host in hosts.items():
+            with gzip.open(self._file(ip), 'wt', encoding='utf-8') as f:
+                json.dump(host, f, ensure_ascii=False)
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
 
 class DarkShodan:
     def __init__(self):
+        self.startup_timings = [('imports', _IMPORT_FINISHED - _IMPORT_STARTED)]
+        self.module_timings = {}
         self.api_key = None
         self.api = None
         self.modules = {}
+        self.module_files = {}
+        self.module_watcher = None
+        self.module_lock = threading.Lock()
+        self.module_index = ModuleIndex()
         self.current_module = None
         self.last_search_results = []
+        self.last_results = []
+        self.result_table = ResultTable()
+        self.result_view = self.result_table
+        self.result_source = ''
         self.language = 'eng'
         self.translations = {}
         self.config = {}
-        self.load_config('config.json')
-        self.load_language()
-        self.load_modules()
+        self._timed_stage('config', self.load_config, 'config.json')
+        if not self.translations:
+            self._timed_stage('language', self.load_language)
+        self.ledger = self._timed_stage('credit ledger', self._open_ledger)
+        self.host_cache = self._timed_stage('host cache', self._open_host_cache)
+        self.rollups = self._timed_stage('rollup store', self._open_rollups)
+        self._timed_stage('modules', self.load_modules)
+        self.startup_finished = time.perf_counter()
+
+    def _timed_stage(self, label, stage, *args):
+        started = time.perf_counter()
+        result = stage(*args)
+        self.startup_timings.append((label, time.perf_counter() - started))
+        return result
+
+    def _open_host_cache(self):
+        return HostCache(
+            self.config.get('enrich:cache_dir', 'host_cache'),
+            self.config.get('enrich:cache_ttl', 86400),
+            self.config.get('enrich:cache_max_mb', 200) * 1024 * 1024,
+        )
+
+    def _open_rollups(self):
+        return RollupStore(
+            self.config.get('rollups:file', 'rollups.json'),
+            self.config.get('rollups:hourly_retention_days', 14),
+            self.config.get('rollups:hosts_dir'),
+        )
 
     def load_language(self):
         try:
             lang_file = f"{self.language}.lng"
             if os.path.exists(lang_file):
-                with open(lang_file, 'r', encoding='utf-8') as f:
-                    self.translations = json.load(f)
+                self.translations = self._load_translations(lang_file)
         except Exception as e:
             print(f"{Fore.RED}{self.t('errors.lang_load', e)}{Style.RESET_ALL}")
 
+    def _load_translations(self, lang_file):
+        """
+        Return a flat key -> template map for a language file.
+
+        The nested JSON is flattened once into dotted keys and cached as
+        JSON in __pycache__ next to the file; the cache is reused while the
+        source mtime and size are unchanged.
+        """
+        stat = os.stat(lang_file)
+        cache_dir = os.path.join(os.path.dirname(lang_file) or '.', '__pycache__')
+        cache_file = os.path.join(cache_dir, os.path.basename(lang_file) + '.json')
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['mtime'] == stat.st_mtime and cached['size'] == stat.st_size and isinstance(cached['map'], dict):
+                return cached['map']
+        except Exception:
+            pass
+        with open(lang_file, 'r', encoding='utf-8') as f:
+            flat = self._flatten_translations(json.load(f))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'mtime': stat.st_mtime, 'size': stat.st_size, 'map': flat}, f, ensure_ascii=False)
+        except OSError:
+            pass
+        return flat
+
+    def _flatten_translations(self, tree, prefix=''):
+        flat = {}
+        for key, value in tree.items():
+            if isinstance(value, dict):
+                flat.update(self._flatten_translations(value, f"{prefix}{key}."))
+            elif isinstance(value, str):
+                flat[prefix + key] = value
+        return flat
+
     def t(self, key, *args):
-        value = self.translations
-        for part in key.split('.'):
-            value = value.get(part, {})
-        if isinstance(value, str):
-            return value.format(*args) if args else value
-        return key
+        value = self.translations.get(key)
+        if value is None:
+            return key
+        return value.format(*args) if args else value
 
     def load_modules(self):
-        modules_dir = os.path.join(os.path.dirname(__file__), self.config.get('modules_path', 'modules'))
-        for file in os.listdir(modules_dir):
-            if file.endswith('.py') and file != '__init__.py':
-                module_name = file[:-3]
+        self.reload_modules(quiet=True)
+
+    def _modules_dir(self):
+        return os.path.join(os.path.dirname(__file__), self.config.get('modules_path', 'modules'))
+
+    def _load_module_file(self, path):
+        module_name = os.path.basename(path)[:-3]
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        loaded = {}
+        for attr_name in dir(module):
+            attr = getattr(module, attr_name)
+            if isinstance(attr, type) and (hasattr(attr, 'execute') or hasattr(attr, 'stream')):
+                loaded[attr.__name__.lower()] = attr()
+        info = getattr(module, 'MODULE_INFO', '')
+        if isinstance(info, dict):
+            info = ' '.join(str(v) for v in info.values())
+        return loaded, str(info)
+
+    def reload_modules(self, quiet=False):
+        """
+        Re-import only module files that were added, changed or deleted.
+
+        Files are tracked by mtime first and by content hash second, so a
+        touched but unchanged file is not executed again. A file that fails
+        to import is recorded as well, so its error is reported once and it
+        is retried only after it changes again; the previously loaded
+        version of its modules stays available meanwhile. The new module
+        table is built aside and swapped into self.modules in one step;
+        the API connection and other session state are left untouched.
+        The watcher thread and the reload command share module_lock, so one
+        reload never overwrites the result of another.
+        """
+        with self.module_lock:
+            return self._reload_modules(quiet)
+
+    def _reload_modules(self, quiet):
+        modules_dir = self._modules_dir()
+        modules = dict(self.modules)
+        files = dict(self.module_files)
+        changed, added = 0, 0
+        seen = set()
+        for file in sorted(os.listdir(modules_dir)):
+            if not file.endswith('.py') or file == '__init__.py':
+                continue
+            path = os.path.join(modules_dir, file)
+            seen.add(path)
+            entry = files.get(path)
+            try:
+                mtime = os.path.getmtime(path)
+                if entry and entry['mtime'] == mtime:
+                    continue
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha1(f.read()).hexdigest()
+                if entry and entry['hash'] == digest:
+                    files[path] = dict(entry, mtime=mtime)
+                    continue
+            except OSError as e:
+                print(f"{Fore.RED}{self.t('errors.module_load', file[:-3], e)}{Style.RESET_ALL}")
+                continue
+            try:
+                started = time.perf_counter()
+                loaded, info = self._load_module_file(path)
+                self.module_timings[file] = time.perf_counter() - started
+            except Exception as e:
+                print(f"{Fore.RED}{self.t('errors.module_load', file[:-3], e)}{Style.RESET_ALL}")
+                names = entry['names'] if entry else []
+                files[path] = {'mtime': mtime, 'hash': digest, 'names': names, 'info': entry['info'] if entry else '', 'error': str(e)}
+                continue
+            for key in (entry['names'] if entry else []):
+                modules.pop(key, None)
+            modules.update(loaded)
+            files[path] = {'mtime': mtime, 'hash': digest, 'names': list(loaded), 'info': info}
+            if entry:
+                changed += 1
+            else:
+                added += 1
+        removed = 0
+        for path in [p for p in files if p not in seen]:
+            kept = {key for p in seen if p in files for key in files[p]['names']}
+            for key in files.pop(path)['names']:
+                if key not in kept:
+                    modules.pop(key, None)
+            removed += 1
+        infos = {key: entry['info'] for entry in files.values() for key in entry['names']}
+        self.module_index = ModuleIndex.build(modules, infos)
+        self.modules = modules
+        self.module_files = files
+        if self.current_module is not None:
+            key = self.current_module.__class__.__name__.lower()
+            self.current_module = modules.get(key)
+        self.last_search_results = [(idx, name, modules[name]) for idx, name, _ in self.last_search_results if name in modules]
+        if not quiet:
+            print(f"{Fore.GREEN}{self.t('success.modules_reloaded', changed, added, removed)}{Style.RESET_ALL}")
+        return changed, added, removed
+
+    def watch_modules(self, enable):
+        """Poll the modules directory in the background and reload on change"""
+        if self.module_watcher:
+            self.module_watcher.set()
+            self.module_watcher = None
+        if not enable:
+            print(f"{Fore.YELLOW}{self.t('success.watch_disabled')}{Style.RESET_ALL}")
+            return
+        stop = threading.Event()
+        interval = self.config.get('modules:watch_interval', 1.0)
+
+        def poll():
+            while not stop.wait(interval):
                 try:
-                    spec = importlib.util.spec_from_file_location(module_name, os.path.join(modules_dir, file))
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    for attr_name in dir(module):
-                        attr = getattr(module, attr_name)
-                        if isinstance(attr, type) and hasattr(attr, 'execute'):
-                            self.modules[attr.__name__.lower()] = attr()
+                    counts = self.reload_modules(quiet=True)
+                    if any(counts):
+                        print(f"\n{Fore.GREEN}{self.t('success.modules_reloaded', *counts)}{Style.RESET_ALL}")
                 except Exception as e:
-                    print(f"{Fore.RED}{self.t('errors.module_load', module_name, e)}{Style.RESET_ALL}")
+                    print(f"\n{Fore.RED}{self.t('errors.generic', e)}{Style.RESET_ALL}")
+
+        threading.Thread(target=poll, daemon=True).start()
+        self.module_watcher = stop
+        print(f"{Fore.GREEN}{self.t('success.watch_enabled', interval)}{Style.RESET_ALL}")
+
+    def _open_ledger(self):
+        ledger = CreditLedger(self.config.get('credits:ledger_file', 'credit_ledger.json'))
+        self._configure_ledger(ledger)
+        return ledger
+
+    def _configure_ledger(self, ledger):
+        ledger.reconcile_interval = self.config.get('credits:reconcile_interval', 3600)
+        ledger.run_budget = self.config.get('credits:run_budget')
+        ledger.daily_budget = self.config.get('credits:daily_budget')
+        ledger.days_retention = self.config.get('credits:days_retention', 90)
+
+    def _available_credits(self, api, api_key, force=False):
+        """Estimated balance from the ledger, calling api.info() only when due"""
+        balance = None if force else self.ledger.balance(api_key)
+        if balance is None:
+            balance = api.info().get('query_credits', 0)
+            self.ledger.reconcile(api_key, balance)
+        return balance
+
+    def _make_client(self, api_key):
+        client = _shodan().Shodan(api_key)
+        # LedgerClient spaces requests by api:min_interval, so the library's
+        # own fixed 1 request/s limiter is switched off
+        client.api_rate_limit = 0
+        if self.config.get('api:base_url'):
+            client.base_url = self.config['api:base_url'].rstrip('/')
+        return client
 
     def connect(self):
         if not self.api_key:
             self.api_key = input(f"{Fore.YELLOW}{self.t('enter_api_key')} {Style.RESET_ALL}")
         try:
-            self.api = shodan.Shodan(self.api_key)
-            info = self.api.info()
-            available_credits = info.get('query_credits', 0)
+            client = self._make_client(self.api_key)
+            available_credits = self._available_credits(client, self.api_key)
             min_requests = self.config.get('default:min_requests', 10)
             if available_credits < min_requests:
                 print(f"{Fore.RED}{self.t('errors.no_suitable_keys', min_requests)}{Style.RESET_ALL}")
                 self.api = None
                 return False
+            self.api = LedgerClient(client, self.api_key, self.ledger, self.config.get('api:min_interval', 1.0))
             print(f"{Fore.GREEN}{self.t('success.connected')}{Style.RESET_ALL}")
             print(f"{Fore.CYAN}{self.t('success.available_requests', available_credits)}{Style.RESET_ALL}")
             return True
@@ -88,13 +1055,12 @@ class DarkShodan:
             print(f"{Fore.YELLOW}{self.t('errors.api_keys_found', len(api_keys))}{Style.RESET_ALL}")
             for api_key in api_keys:
                 try:
-                    test_api = shodan.Shodan(api_key)
-                    info = test_api.info()
-                    available_credits = info.get('query_credits', 0)
+                    test_api = self._make_client(api_key)
+                    available_credits = self._available_credits(test_api, api_key)
                     print(f"{Fore.CYAN}{self.t('errors.key_check', api_key[:10], available_credits)}{Style.RESET_ALL}")
                     if available_credits >= min_requests:
                         self.api_key = api_key
-                        self.api = test_api
+                        self.api = LedgerClient(test_api, api_key, self.ledger, self.config.get('api:min_interval', 1.0))
                         print(f"{Fore.GREEN}{self.t('errors.suitable_key', available_credits)}{Style.RESET_ALL}")
                         return True
                 except Exception as e:
@@ -105,6 +1071,21 @@ class DarkShodan:
             print(f"{Fore.RED}{self.t('errors.file_read_error', e)}{Style.RESET_ALL}")
             return False
 
+    def show_credits(self, sync=False):
+        if not self.api_key:
+            print(f"{Fore.YELLOW}{self.t('credits.not_connected')}{Style.RESET_ALL}")
+        else:
+            try:
+                balance = self._available_credits(self.api, self.api_key, force=sync) if self.api else self.ledger.balance(self.api_key)
+                print(f"{Fore.CYAN}{self.t('credits.balance', balance if balance is not None else '?')}{Style.RESET_ALL}")
+            except Exception as e:
+                print(f"{Fore.RED}{self.t('errors.connect', e)}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}{self.t('credits.run', self.ledger.run_module or '-', self.ledger.run_spent)}{Style.RESET_ALL}")
+        day = self.ledger.data['days'].get(self.ledger.today(), {})
+        print(f"{Fore.CYAN}{self.t('credits.today', sum(day.values()), self.ledger.daily_budget or '-')}{Style.RESET_ALL}")
+        for module_name, spent in sorted(day.items(), key=lambda item: -item[1]):
+            print(f"{Fore.GREEN}  {module_name:<30}{Fore.WHITE}{spent}{Style.RESET_ALL}")
+
     def show_banner(self):
         banner = f"""
 {Fore.RED}
@@ -120,7 +1101,8 @@ class DarkShodan:
         print(f"{Fore.CYAN}{self.t('banner')}{Style.RESET_ALL}")
 
     def search_modules(self, query):
-        results_raw = [(n, m) for n, m in self.modules.items() if query.lower() in n.lower() or query.lower() in m.name.lower()]
+        modules = self.modules
+        results_raw = [(n, modules[n]) for n in self.module_index.search(query) if n in modules]
         if results_raw:
             print(f"\n{Fore.CYAN}{self.t('search.results')}{Style.RESET_ALL}")
             self.last_search_results = []
@@ -160,13 +1142,99 @@ class DarkShodan:
             return
         try:
             max_results = self.config.get('default:max_results', 50)
-            result = self.current_module.execute(self.api, query, max_results)
-            if hasattr(result, '__iter__') and not isinstance(result, str):
-                print(f"{Fore.GREEN}{self.t('success.module_executed')}{Style.RESET_ALL}")
+            module_name = self.current_module.__class__.__name__.lower()
+            self.ledger.start_run(module_name)
+            # Modules catch every exception, so a budget error raised inside
+            # them would look like an empty run; check before calling them
+            self.ledger.check(self.api_key, self.ledger.estimate(max_results))
+            searches = (getattr(self.api, 'succeeded', 0), getattr(self.api, 'failed', 0), getattr(self.api, 'blocked', 0))
+            source = self._open_module_source(self.current_module, query, max_results)
+            if source is None:
+                return
+            exporter = self._open_exporter(module_name) if self.config.get('export:format') else None
+            keep = self.config.get('results:keep_in_memory', True)
+            rollup = self.rollups.begin()
+            records = []
+            count = 0
+            shown = 0
+            try:
+                for record in self._iter_records(source, max_results):
+                    count += 1
+                    if keep:
+                        records.append(record)
+                    if exporter:
+                        exporter.write(record)
+                    self.rollups.add(rollup, record, module_name)
+                    if time.perf_counter() - shown > 0.2:
+                        shown = time.perf_counter()
+                        print(f"{Fore.CYAN}{self.t('progress.records', count, max_results)}{Style.RESET_ALL}", end="\r")
+            finally:
+                if exporter:
+                    self._close_exporter(exporter)
+            print(f"{Fore.CYAN}{self.t('progress.records', count, max_results)}{Style.RESET_ALL}")
+            if getattr(self.api, 'blocked', 0) > searches[2]:
+                print(f"{Fore.RED}{self.t('credits.blocked', self.t('credits.blocked_in_run'))}{Style.RESET_ALL}")
+                return
+            self.last_results = records
+            self._set_results(self.last_results, module_name)
+            if not keep:
+                print(f"{Fore.YELLOW}{self.t('progress.not_kept')}{Style.RESET_ALL}")
+            if getattr(self.api, 'failed', 0) == searches[1] and getattr(self.api, 'succeeded', 0) > searches[0]:
+                total = getattr(self.api, 'last_total', None)
+                partial = bool(max_results) and count >= max_results or total is not None and total > count
+                changes = self.rollups.commit(module_name, rollup, total=total, partial=partial)
+                if changes is None:
+                    print(f"{Fore.YELLOW}{self.t('trend.partial', total if total is not None else count, count)}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.CYAN}{self.t('trend.updated', *changes)}{Style.RESET_ALL}")
             else:
-                print(f"{Fore.WHITE}{result}{Style.RESET_ALL}")
+                print(f"{Fore.YELLOW}{self.t('trend.skipped')}{Style.RESET_ALL}")
+            if keep and self.config.get('enrich:auto', False):
+                self.enrich_results()
+            print(f"{Fore.GREEN}{self.t('success.module_executed')}{Style.RESET_ALL}")
+        except CreditBudgetError as e:
+            print(f"{Fore.RED}{self.t('credits.blocked', e)}{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}{self.t('errors.module_load', 'execution', e)}{Style.RESET_ALL}")
+        finally:
+            self.ledger.flush()
+
+    def _open_module_source(self, module, query, max_results):
+        """
+        Adapt both module contracts to an iterable of records or pages.
+
+        Streaming modules define stream(api, query, max_results) and yield
+        records (dicts) or pages (lists of records) as they arrive. Classic
+        modules only define execute() and their returned list is replayed.
+        Returns None when a classic module returned a plain message instead.
+
+        run_module keeps every record in last_results for the table, export
+        and enrich commands. Only a streaming module combined with
+        results:keep_in_memory set to false runs in bounded memory: records
+        then go to the exporter and the rollups and are dropped.
+        """
+        if hasattr(module, 'stream'):
+            return module.stream(self.api, query, max_results)
+        result = module.execute(self.api, query, max_results)
+        if hasattr(result, '__iter__') and not isinstance(result, str):
+            return result
+        print(f"{Fore.WHITE}{result}{Style.RESET_ALL}")
+        return None
+
+    def _iter_records(self, source, max_results):
+        """Flatten pages into records, stopping once max_results were seen"""
+        count = 0
+        try:
+            for item in source:
+                page = item if isinstance(item, list) else [item]
+                for record in page:
+                    yield record
+                    count += 1
+                    if max_results and count >= max_results:
+                        return
+        finally:
+            if hasattr(source, 'close'):
+                source.close()
 
     def search_direct(self, query, filter_file=None):
         """
@@ -177,6 +1245,7 @@ class DarkShodan:
         
         try:
             max_results = self.config.get('default:max_results', 50)
+            self.ledger.start_run('direct_search')
             print(f"{Fore.CYAN}{self.t('search.executing_direct', query)}{Style.RESET_ALL}")
             print(f"{Fore.CYAN}{self.t('search.max_results', max_results)}{Style.RESET_ALL}")
             
@@ -189,12 +1258,20 @@ class DarkShodan:
             self._display_search_results(results['matches'], filter_config)
             
             self._save_search_results(results['matches'])
+            self.last_results = results['matches']
+            self._set_results(self.last_results, 'direct_search')
+            if self.config.get('export:format'):
+                exporter = self._open_exporter('direct_search')
+                exporter.write_many(self.last_results)
+                self._close_exporter(exporter)
             
             return results['matches']
             
         except Exception as e:
             print(f"{Fore.RED}{self.t('errors.direct_search_error', e)}{Style.RESET_ALL}")
             return []
+        finally:
+            self.ledger.flush()
     
     def _load_filter_config(self, filter_file):
         """Load JSON filter configuration"""
@@ -276,7 +1353,7 @@ class DarkShodan:
         if not results:
             return
             
-        results_dir = os.path.join(os.path.dirname(__file__), 'results')
+        results_dir = self._results_dir()
         os.makedirs(results_dir, exist_ok=True)
         
         from datetime import datetime
@@ -289,6 +1366,209 @@ class DarkShodan:
         
         print(f"{Fore.GREEN}{self.t('search.results_saved', filepath)}{Style.RESET_ALL}")
 
+    def _results_dir(self):
+        return self.config.get('results_dir') or os.path.join(os.path.dirname(__file__), 'results')
+
+    def _open_exporter(self, module_name, fmt=None, path=None):
+        fmt = fmt or self.config.get('export:format', 'csv')
+        if path is None:
+            results_dir = self._results_dir()
+            os.makedirs(results_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(results_dir, f"{module_name}-{timestamp}.{fmt}")
+        row_group_size = self.config.get('export:row_group_size', 10000)
+        return ResultExporter(path, fmt, row_group_size, module_name)
+
+    def _close_exporter(self, exporter):
+        rows = exporter.close()
+        print(f"{Fore.GREEN}{self.t('export.saved', rows, exporter.path)}{Style.RESET_ALL}")
+
+    def export_results(self, fmt, path=None):
+        if not self.last_results:
+            print(f"{Fore.YELLOW}{self.t('table.empty')}{Style.RESET_ALL}")
+            return
+        if fmt not in ResultExporter.FORMATS:
+            print(f"{Fore.RED}{self.t('export.unknown_format', ', '.join(ResultExporter.FORMATS))}{Style.RESET_ALL}")
+            return
+        try:
+            exporter = self._open_exporter(self.result_source or 'results', fmt, path)
+            exporter.write_many(self.last_results)
+            self._close_exporter(exporter)
+        except Exception as e:
+            print(f"{Fore.RED}{self.t('export.error', e)}{Style.RESET_ALL}")
+
+    def show_trend(self, parts):
+        if len(parts) > 1 and parts[1] == 'export':
+            path = parts[2] if len(parts) > 2 else 'trend_export.json'
+            self.rollups.export(path)
+            print(f"{Fore.GREEN}{self.t('trend.exported', path)}{Style.RESET_ALL}")
+            return
+        if len(parts) < 2:
+            print(f"{Fore.YELLOW}{self.t('trend.usage')}{Style.RESET_ALL}")
+            print(f"{Fore.CYAN}{self.t('trend.modules', ', '.join(sorted(self.rollups.load()['modules'])) or '-')}{Style.RESET_ALL}")
+            return
+        granularity = 'hourly' if 'hourly' in parts[2:] else 'daily'
+        country = ' '.join(p for p in parts[2:] if p not in ('daily', 'hourly')) or None
+        rows = self.rollups.series(parts[1], granularity, country)
+        if not rows:
+            print(f"{Fore.YELLOW}{self.t('trend.no_data', parts[1])}{Style.RESET_ALL}")
+            return
+        print(f"{Fore.CYAN}{self.t('trend.title', parts[1], granularity, country or '*')}{Style.RESET_ALL}")
+        peak = max(row[1] for row in rows) or 1
+        for key, active, new, resolved, partial in rows[-30:]:
+            bar = '#' * max(1 if active else 0, active * 40 // peak)
+            mark = '~' if partial else ' '
+            print(f"{Fore.GREEN}{key:<14}{mark}{Fore.WHITE}{active:>7} +{new:<6} -{resolved:<6} {bar}{Style.RESET_ALL}")
+        if any(row[4] for row in rows[-30:]):
+            print(f"{Fore.YELLOW}{self.t('trend.partial_legend')}{Style.RESET_ALL}")
+
+    def enrich_results(self, history=False):
+        """
+        Attach full host details to the last results.
+
+        Unique IPs are served from the host cache where possible; the rest
+        are looked up in batches through the rate limited client. IPs Shodan
+        has no information about are cached as empty entries under the same
+        TTL, so repeated runs do not ask for them again.
+        """
+        ips = list(dict.fromkeys(host['ip'] for host in (host_record(r) for r in self.last_results) if host and host['ip']))
+        if not ips:
+            print(f"{Fore.YELLOW}{self.t('table.empty')}{Style.RESET_ALL}")
+            return
+        hosts = {}
+        missing = []
+        for ip in ips:
+            cached = self.host_cache.get(ip)
+            if cached is None or (history and not cached.get('_history')):
+                missing.append(ip)
+            else:
+                hosts[ip] = cached
+        print(f"{Fore.CYAN}{self.t('enrich.start', len(ips), len(hosts), len(missing))}{Style.RESET_ALL}")
+        if missing and not self.api and not self.connect():
+            return
+        batch_size = self.config.get('enrich:batch_size', 10)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            fetched = self._fetch_hosts(batch, history)
+            self.host_cache.put_many(fetched)
+            hosts.update(fetched)
+            print(f"{Fore.CYAN}{self.t('enrich.progress', min(start + batch_size, len(missing)), len(missing))}{Style.RESET_ALL}", end="\r")
+        if missing:
+            self.host_cache.evict()
+        enriched = 0
+        for record in self.last_results:
+            host = host_record(record)
+            details = hosts.get(host['ip']) if host else None
+            if details and not details.get('_empty'):
+                record['enrichment'] = {
+                    'ports': details.get('ports', []),
+                    'vulns': sorted(details.get('vulns', [])),
+                    'os': details.get('os'),
+                    'tags': details.get('tags', []),
+                    'hostnames': details.get('hostnames', []),
+                    'last_update': details.get('last_update'),
+                    'services': len(details.get('data', [])),
+                }
+                enriched += 1
+        print(f"\n{Fore.GREEN}{self.t('enrich.done', enriched, len(self.last_results))}{Style.RESET_ALL}")
+        if enriched:
+            self._save_enriched_results(self.last_results)
+
+    def _fetch_hosts(self, ips, history):
+        """
+        Look up ips in one request; when that fails, retry them one by one.
+
+        Returns ip -> host details. An IP Shodan answers 'No information
+        available' for (or leaves out of a batch answer) gets an '_empty'
+        entry; IPs that failed for other reasons are reported and left out.
+        """
+        try:
+            found = self.api.host(ips if len(ips) > 1 else ips[0], history=history)
+        except Exception as e:
+            if len(ips) > 1:
+                fetched = {}
+                for ip in ips:
+                    fetched.update(self._fetch_hosts([ip], history))
+                return fetched
+            if 'no information available' in str(e).lower():
+                return {ips[0]: {'ip_str': ips[0], '_empty': True, '_history': history}}
+            print(f"{Fore.RED}{self.t('enrich.error', ips[0], e)}{Style.RESET_ALL}")
+            return {}
+        fetched = {ip: {'ip_str': ip, '_empty': True, '_history': history} for ip in ips}
+        for host in (found if isinstance(found, list) else [found]):
+            host['_history'] = history
+            fetched[host.get('ip_str', '')] = host
+        return fetched
+
+    def _save_enriched_results(self, results):
+        results_dir = self._results_dir()
+        os.makedirs(results_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(results_dir, f"{self.result_source or 'results'}-enriched-{timestamp}.json")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"{Fore.GREEN}{self.t('search.results_saved', filepath)}{Style.RESET_ALL}")
+
+    def _set_results(self, records, module_name):
+        self.result_source = module_name
+        self.result_table = ResultTable.from_records(records, module_name)
+        self.result_view = self.result_table
+
+    def _table_column(self, name):
+        if name not in self.result_view.columns:
+            print(f"{Fore.RED}{self.t('table.unknown_column', name, ', '.join(self.result_view.columns))}{Style.RESET_ALL}")
+            return None
+        return name
+
+    def _print_rows(self, rows, limit=20):
+        view = self.result_view
+        print("=" * 100)
+        for row in rows[:limit]:
+            values = view.row(row)
+            ip_port = f"{values['ip']}:{values['port']}"
+            print(f"{ip_port:<22} | {values['org'][:20]:<20} | {values['country'][:15]:<15} | {values['city'][:15]:<15} | {values['product'][:20]}")
+        print("=" * 100)
+        print(f"{Fore.GREEN}{self.t('table.shown', min(limit, len(rows)), len(rows))}{Style.RESET_ALL}")
+
+    def table_command(self, parts):
+        """Dispatch the table, sort, group, top and where shell commands"""
+        view = self.result_view
+        if not len(self.result_table):
+            print(f"{Fore.YELLOW}{self.t('table.empty')}{Style.RESET_ALL}")
+            return
+        command = parts[0]
+        column = {'sort': 1, 'group': 2, 'top': 2, 'where': 1}.get(command)
+        if column is not None and len(parts) > column and not self._table_column(parts[column]):
+            return
+        if command == 'table':
+            if len(parts) > 1 and parts[1] == 'reset':
+                self.result_view = self.result_table
+            print(f"{Fore.CYAN}{self.t('table.summary', len(self.result_view), len(self.result_table), ', '.join(view.columns))}{Style.RESET_ALL}")
+        elif command == 'sort' and len(parts) > 1:
+            options = parts[2:]
+            limit = int(next((o for o in options if o.isdigit()), 20))
+            self._print_rows(view.sort(parts[1], descending='desc' in options), limit)
+        elif command == 'group' and len(parts) > 2 and parts[1] == 'by':
+            self._print_groups(parts[2], view.group(parts[2]), len(view))
+        elif command == 'top' and len(parts) > 2 and parts[1].isdigit():
+            self._print_groups(parts[2], view.group(parts[2])[:int(parts[1])], len(view))
+        elif command == 'where' and len(parts) > 3:
+            if parts[2] not in ResultTable.COMPARE:
+                print(f"{Fore.RED}{self.t('table.unknown_operator', ' '.join(ResultTable.COMPARE))}{Style.RESET_ALL}")
+                return
+            rows = view.where(parts[1], parts[2], ' '.join(parts[3:]))
+            self.result_view = view.take(rows)
+            self._print_rows(list(range(len(self.result_view))))
+        else:
+            print(f"{Fore.YELLOW}{self.t('table.usage')}{Style.RESET_ALL}")
+
+    def _print_groups(self, name, groups, total):
+        print(f"{Fore.CYAN}{self.t('table.group_title', name, total)}{Style.RESET_ALL}")
+        for value, count in groups:
+            if name == 'ip' and isinstance(value, int):
+                value = str(ipaddress.IPv4Address(value))
+            print(f"{Fore.GREEN}  {str(value)[:40]:<42}{Fore.WHITE}{count:>8}  {count * 100 / total:5.1f}%{Style.RESET_ALL}")
+
     def show_help(self):
         help_order = [
             ('search <query>', 'commands.search'),
@@ -298,6 +1578,18 @@ class DarkShodan:
             ('autoconnect <file> <requests>', 'commands.autoconnect'),
             ('set lang <ru/eng>', 'commands.set_lang'),
             ('set cfg <filename>', 'commands.set_cfg'),
+            ('table [reset]', 'commands.table'),
+            ('sort <column> [desc] [n]', 'commands.sort'),
+            ('group by <column>', 'commands.group'),
+            ('top <n> <column>', 'commands.top'),
+            ('where <column> <op> <value>', 'commands.where'),
+            ('export <csv/csv.gz/parquet> [file]', 'commands.export'),
+            ('trend <module> [daily/hourly] [country]', 'commands.trend'),
+            ('trend export [file]', 'commands.trend_export'),
+            ('enrich [history]', 'commands.enrich'),
+            ('credits [sync]', 'commands.credits'),
+            ('reload', 'commands.reload'),
+            ('watch <on/off>', 'commands.watch'),
             ('clear', 'commands.clear'),
             ('help', 'commands.help'),
             ('exit', 'commands.exit')
@@ -324,6 +1616,8 @@ class DarkShodan:
             if 'language' in self.config:
                 self.language = self.config['language']
                 self.load_language()
+            if hasattr(self, 'ledger'):
+                self._configure_ledger(self.ledger)
             print(f"{Fore.GREEN}{self.t('success.config_loaded', cfg_file)}{Style.RESET_ALL}")
             return True
         except Exception as e:
@@ -366,6 +1660,20 @@ class DarkShodan:
                         self.set_language(parts[2])
                     elif parts[1] == 'cfg':
                         self.load_config(parts[2])
+                elif parts[0] in ('table', 'sort', 'group', 'top', 'where'):
+                    self.table_command(parts)
+                elif parts[0] == 'export' and len(parts) > 1:
+                    self.export_results(parts[1], parts[2] if len(parts) > 2 else None)
+                elif parts[0] == 'trend':
+                    self.show_trend(parts)
+                elif parts[0] == 'enrich':
+                    self.enrich_results(history='history' in parts[1:])
+                elif parts[0] == 'credits':
+                    self.show_credits(sync=len(parts) > 1 and parts[1] == 'sync')
+                elif parts[0] == 'reload':
+                    self.reload_modules()
+                elif parts[0] == 'watch' and len(parts) > 1:
+                    self.watch_modules(parts[1] == 'on')
                 elif parts[0] == 'help':
                     self.show_help()
                 elif parts[0] == 'clear':
@@ -381,5 +1689,56 @@ class DarkShodan:
             except Exception as e:
                 print(f"{Fore.RED}{self.t('errors.generic', e)}{Style.RESET_ALL}")
 
+    def _import_profile(self, limit=10):
+        """
+        Cumulative import time of each library this file imports.
+
+        Measured with python -X importtime in a fresh interpreter, so
+        libraries already imported by this process are counted as well.
+        Returns (library, microseconds) pairs, slowest first.
+        """
+        import subprocess
+        name = os.path.splitext(os.path.basename(__file__))[0]
+        try:
+            result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {name}"],
+                                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    capture_output=True, text=True, timeout=60)
+        except (OSError, subprocess.SubprocessError):
+            return []
+        subtree = []
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s*\d+ \|\s*(\d+) \|( *)(\S+)', line)
+            if not match:
+                continue
+            cumulative, depth, package = int(match.group(1)), len(match.group(2)), match.group(3)
+            if depth == 1 and package == name:
+                children = [(p, us) for d, p, us in subtree if d == 3]
+                return sorted(children, key=lambda item: -item[1])[:limit]
+            subtree = [] if depth == 1 else subtree + [(depth, package, cumulative)]
+        return []
+
+    def show_startup_profile(self):
+        print(f"{Fore.CYAN}{self.t('profile.title')}{Style.RESET_ALL}")
+        total = self.startup_finished - _IMPORT_STARTED
+        for label, seconds in self.startup_timings:
+            print(f"{Fore.GREEN}{label:<30}{Fore.WHITE}{seconds * 1000:>9.2f} ms{Style.RESET_ALL}")
+        other = total - sum(seconds for _, seconds in self.startup_timings)
+        print(f"{Fore.GREEN}{'other':<30}{Fore.WHITE}{other * 1000:>9.2f} ms{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}{'total':<30}{Fore.WHITE}{total * 1000:>9.2f} ms{Style.RESET_ALL}")
+        imports = self._import_profile()
+        if imports:
+            print(f"{Fore.CYAN}{self.t('profile.imports')}{Style.RESET_ALL}")
+            for package, micros in imports:
+                print(f"  {package:<28}{micros / 1000:>9.2f} ms")
+        if self.module_timings:
+            print(f"{Fore.CYAN}{self.t('profile.modules')}{Style.RESET_ALL}")
+            ranked = sorted(self.module_timings.items(), key=lambda item: -item[1])
+            for file, seconds in ranked[:10]:
+                print(f"  {file:<28}{seconds * 1000:>9.2f} ms")
+        print(f"{Fore.YELLOW}{self.t('profile.deferred')}{Style.RESET_ALL}")
+
 if __name__ == '__main__':
-    DarkShodan().start()
\ No newline at end of file
+    framework = DarkShodan()
+    if '--startup-profile' in sys.argv[1:]:
+        framework.show_startup_profile()
+    framework.start()
\ No newline at end of file
@@ -135,7 +135,14 @@ MODULE_DOCUMENTATION = """
    - "country:US product:nginx"
    - "city:New York port:8080"
 
-6. BEST PRACTICES:
+6. STREAMING CONTRACT (OPTIONAL):
+   - Define stream(api, query, max_results) instead of execute()
+   - Yield records (dicts) or whole pages (lists) as they arrive
+   - Page with api.search(query, page=N), 100 matches per page
+   - The framework shows live progress and closes the generator
+     once max_results records were received
+
+7. BEST PRACTICES:
    - Add error handling
    - Include documentation
    - Use descriptive variable names
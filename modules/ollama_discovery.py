@@ -2,7 +2,6 @@
 
 import json
 import os
-import requests
 from datetime import datetime
 
 class ollama_discovery:
@@ -31,6 +30,7 @@ class ollama_discovery:
 
     def _verify_instances(self, matches):
         import random
+        import requests
         verified = []
         print(f"[+] Found {len(matches)} potential instances. Starting verification...")
         
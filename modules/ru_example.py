@@ -34,6 +34,12 @@ class ExampleModule:
                 'standard': "Вывод в формате список строк",
                 'recommended': "IP:Port - Информация",
                 'extended': "Дополнительные данные через |"
+            },
+            'streaming': {
+                'method': "stream(api, query, max_results) вместо execute()",
+                'yield': "Отдавать записи (dict) или страницы (list) через yield",
+                'paging': "api.search(query, page=N) - по 100 записей на страницу",
+                'limit': "Фреймворк сам остановит генератор при достижении max_results"
             }
         }
     
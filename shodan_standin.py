@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Local Shodan-compatible HTTP stand-in and load-test driver.
+
+The server answers the search, count, api-info and host endpoints with
+synthetic, seeded data, so pagination, slow responses, rate limiting and
+very large result sets can be exercised without a paid API key:
+
+    python shodan_standin.py serve --port 8088 --total 1000000 --latency 50
+    python shodan_standin.py loadtest --runs 3 --max-results 5000
+
+Point the framework at a running stand-in with "api:base_url" in the
+configuration (e.g. "http://127.0.0.1:8088"); any API key is accepted.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COUNTRIES = [
+    ('US', 'United States', ['New York', 'Chicago', 'Dallas', 'Seattle']),
+    ('DE', 'Germany', ['Berlin', 'Frankfurt am Main', 'Munich']),
+    ('CN', 'China', ['Beijing', 'Shanghai', 'Shenzhen']),
+    ('RU', 'Russian Federation', ['Moscow', 'Saint Petersburg']),
+    ('BR', 'Brazil', ['Sao Paulo', 'Rio de Janeiro']),
+    ('JP', 'Japan', ['Tokyo', 'Osaka']),
+    ('KP', 'North Korea', ['Pyongyang']),
+]
+ORGS = ['Amazon.com', 'DigitalOcean, LLC', 'Hetzner Online GmbH', 'OVH SAS', 'China Telecom',
+        'Comcast Cable', 'Rostelecom', 'Google LLC', 'Linode', 'Star Joint Venture Co.']
+PRODUCTS = [('nginx', 80), ('Apache httpd', 80), ('MongoDB', 27017), ('VNC', 5900),
+            ('vsftpd', 21), ('OctoPrint', 5000), ('Ollama', 11434), ('Blue Iris', 81)]
+PAGE_SIZE = 100
+
+
+class StandinState:
+    """Settings and counters shared by all request handlers"""
+
+    def __init__(self, seed=1337, total=10000, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=0.0, credits=100000, host_miss_rate=0.0):
+        self.seed = seed
+        self.total = total
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.credits = credits
+        self.host_miss_rate = host_miss_rate
+        self.requests = 0
+        self.errors = 0
+        self.limited = 0
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.random = random.Random(seed)
+
+    def admit(self):
+        """Return an HTTP status for the next request: 200, 429 or 500"""
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                while self.window and now - self.window[0] > 1.0:
+                    self.window.popleft()
+                if len(self.window) >= self.rate_limit:
+                    self.limited += 1
+                    return 429
+                self.window.append(now)
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.errors += 1
+                return 500
+            delay = max(0.0, self.random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if delay:
+            time.sleep(delay)
+        return 200
+
+    def total_for(self, query):
+        """Result count for a query, stable for the same seed"""
+        if not query:
+            return self.total
+        rng = random.Random(f"{self.seed}:{query}")
+        return int(self.total * rng.uniform(0.2, 1.0))
+
+    def match(self, query, index):
+        rng = random.Random(f"{self.seed}:{query}:{index}")
+        ip = f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        return self._banner(rng, ip)
+
+    def _banner(self, rng, ip, port=None, product=None):
+        code, country, cities = rng.choice(COUNTRIES)
+        city = rng.choice(cities)
+        if port is None:
+            product, port = rng.choice(PRODUCTS)
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(1700000000 + rng.randint(0, 60 * 86400)))
+        return {
+            'ip_str': ip,
+            'port': port,
+            'transport': 'tcp',
+            'org': rng.choice(ORGS),
+            'isp': rng.choice(ORGS),
+            'asn': f"AS{rng.randint(1000, 65000)}",
+            'product': product,
+            'hostnames': [f"host{rng.randint(1, 9999)}.example.net"] if rng.random() < 0.3 else [],
+            'timestamp': f"{timestamp}.{rng.randint(0, 999999):06d}",
+            'country_name': country,
+            'city': city,
+            'location': {'country_code': code, 'country_name': country, 'city': city,
+                         'latitude': round(rng.uniform(-60, 70), 4), 'longitude': round(rng.uniform(-150, 150), 4)},
+            'http': {'server': product, 'title': f"{product} on {ip}"},
+            'data': f"{product} banner\r\n",
+        }
+
+    def missing(self, ip):
+        """Whether there is no host information for ip, stable for the same seed"""
+        return bool(self.host_miss_rate) and random.Random(f"{self.seed}:missing:{ip}").random() < self.host_miss_rate
+
+    def host(self, ip):
+        rng = random.Random(f"{self.seed}:host:{ip}")
+        services = [self._banner(rng, ip, port, product) for product, port in rng.sample(PRODUCTS, rng.randint(1, 4))]
+        first = services[0]
+        return {
+            'ip_str': ip,
+            'ports': sorted(s['port'] for s in services),
+            'hostnames': first['hostnames'],
+            'org': first['org'],
+            'isp': first['isp'],
+            'asn': first['asn'],
+            'os': rng.choice([None, 'Linux', 'Windows']),
+            'tags': rng.sample(['cloud', 'database', 'self-signed', 'vpn'], rng.randint(0, 2)),
+            'vulns': [f"CVE-20{rng.randint(15, 24)}-{rng.randint(1000, 49999)}" for _ in range(rng.randint(0, 3))],
+            'country_name': first['country_name'],
+            'city': first['city'],
+            'last_update': first['timestamp'],
+            'data': services,
+        }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if not params.get('key'):
+            return self._send(401, {'error': 'Please provide an API key'})
+        status = self.state.admit()
+        if status == 429:
+            return self._send(429, {'error': 'Rate limit reached (1 request/ second)'})
+        if status == 500:
+            return self._send(500, {'error': 'Internal server error (synthetic)'})
+        if url.path == '/api-info':
+            return self._send(200, {'query_credits': self.state.credits, 'scan_credits': 100, 'plan': 'standin'})
+        if url.path in ('/shodan/host/search', '/shodan/host/count'):
+            return self._search(url.path.endswith('count'), params)
+        found = re.match(r'^/shodan/host/([^/]+)$', url.path)
+        if found:
+            ips = found.group(1).split(',')
+            if any(self.state.missing(ip) for ip in ips):
+                return self._send(404, {'error': 'No information available for that IP.'})
+            hosts = [self.state.host(ip) for ip in ips]
+            return self._send(200, hosts if len(hosts) > 1 else hosts[0])
+        self._send(404, {'error': 'No information available for that endpoint'})
+
+    def _search(self, count_only, params):
+        query = params.get('query', '')
+        total = self.state.total_for(query)
+        if count_only:
+            return self._send(200, {'total': total, 'matches': []})
+        if 'limit' in params:
+            start = int(params.get('offset', 0))
+            size = int(params['limit'])
+        else:
+            start = (int(params.get('page', 1)) - 1) * PAGE_SIZE
+            size = PAGE_SIZE
+        with self.state.lock:
+            cost = 1 if size <= PAGE_SIZE else -(-size // PAGE_SIZE)
+            self.state.credits = max(0, self.state.credits - cost)
+        matches = [self.state.match(query, i) for i in range(start, min(start + size, total))]
+        self._send(200, {'total': total, 'matches': matches})
+
+
+def start_server(state, host='127.0.0.1', port=0):
+    """Start the stand-in in a daemon thread and return the server object"""
+    handler = type('BoundStandinHandler', (StandinHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_loadtest(args):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from dark_shodan import DarkShodan, LedgerClient, RollupStore
+
+    state = StandinState(args.seed, args.total, args.latency / 1000, args.jitter / 1000,
+                         args.error_rate, args.rate_limit, host_miss_rate=args.host_miss_rate)
+    server = start_server(state)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+
+    # Modules save their JSON next to their own folder, so run copies of
+    # them from the work directory to keep results/ of the checkout clean
+    quiet = open(os.devnull, 'w', encoding='utf-8')
+    with contextlib.redirect_stdout(quiet):
+        probe = DarkShodan()
+    modules_dir = os.path.join(workdir, 'modules')
+    shutil.copytree(probe._modules_dir(), modules_dir, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns('__pycache__'))
+
+    def on_request(seconds, ok):
+        with lock:
+            latencies.append(seconds)
+            if not ok:
+                failures[0] += 1
+
+    def make_framework(index):
+        framework = DarkShodan()
+        framework.config.update({
+            'api:base_url': base_url,
+            'api:min_interval': args.min_interval,
+            'default:max_results': args.max_results,
+            'export:format': args.export,
+            'modules_path': modules_dir,
+            'results_dir': os.path.join(workdir, 'results'),
+        })
+        framework.reload_modules(quiet=True)
+        framework.ledger.path = os.path.join(workdir, f"credit_ledger-{index}.json")
+        framework.ledger.data = {'keys': {}, 'days': {}}
+        framework.rollups = RollupStore(os.path.join(workdir, f"rollups-{index}.json"))
+        framework.api_key = 'standin-load-test'
+        framework.connect()
+        if isinstance(framework.api, LedgerClient):
+            framework.api.on_request = on_request
+        return framework
+
+    records = [0]
+    run_times = []
+
+    def worker(index, names):
+        framework = make_framework(index)
+        for name in names:
+            for _ in range(args.runs):
+                framework.current_module = framework.modules[name]
+                started = time.perf_counter()
+                framework.run_module()
+                with lock:
+                    run_times.append(time.perf_counter() - started)
+                    records[0] += len(framework.last_results)
+
+    names = args.modules or [n for n in sorted(probe.modules) if n not in ACTIVE_MODULES]
+    unknown = [n for n in names if n not in probe.modules]
+    if unknown:
+        print(f"[!] Unknown modules: {', '.join(unknown)}")
+        return 1
+    shards = [names[i::args.concurrency] for i in range(args.concurrency)]
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(quiet):
+        threads = [threading.Thread(target=worker, args=(index, shard)) for index, shard in enumerate(shards) if shard]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    quiet.close()
+
+    print(f"[+] Stand-in: {base_url} seed={args.seed} total={args.total} latency={args.latency}ms "
+          f"error_rate={args.error_rate} rate_limit={args.rate_limit}/s")
+    print(f"[+] Modules: {len(names)} x {args.runs} runs, concurrency {args.concurrency}")
+    print("=" * 60)
+    print(f"Elapsed                {elapsed:>12.2f} s")
+    print(f"Module runs            {len(run_times):>12}")
+    print(f"Records                {records[0]:>12}")
+    print(f"Records / s            {records[0] / elapsed:>12.1f}")
+    print(f"Requests (client)      {len(latencies):>12}")
+    print(f"Requests / s           {len(latencies) / elapsed:>12.1f}")
+    print(f"Failed requests        {failures[0]:>12}")
+    print(f"Server 429 / 500       {state.limited:>6} / {state.errors:<5}")
+    for pct in (50, 90, 95, 99):
+        print(f"Latency p{pct:<2}            {percentile(latencies, pct) * 1000:>12.1f} ms")
+    print(f"Module run p50 / p99   {percentile(run_times, 50):>6.2f} / {percentile(run_times, 99):.2f} s")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS               {rss:>12.1f} MB")
+    print("=" * 60)
+    return 0
+
+
+# Modules that actively connect to every result; synthetic addresses would
+# only make them wait for network timeouts, so they are skipped by default.
+ACTIVE_MODULES = ('ollama_discovery',)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Shodan API stand-in for load and soak testing")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def shared(sub):
+        sub.add_argument('--seed', type=int, default=1337, help="seed for synthetic data")
+        sub.add_argument('--total', type=int, default=10000, help="results available for an empty query")
+        sub.add_argument('--latency', type=float, default=0.0, help="mean response latency in ms")
+        sub.add_argument('--jitter', type=float, default=0.0, help="latency standard deviation in ms")
+        sub.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with HTTP 500")
+        sub.add_argument('--rate-limit', type=float, default=0.0, help="requests per second before HTTP 429 (0 = off)")
+        sub.add_argument('--host-miss-rate', type=float, default=0.0, help="share of IPs without host information (HTTP 404)")
+
+    serve = commands.add_parser('serve', help="run the stand-in server")
+    shared(serve)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8088)
+
+    loadtest = commands.add_parser('loadtest', help="run modules against an in-process stand-in")
+    shared(loadtest)
+    loadtest.add_argument('--modules', nargs='*', help="module names (default: all passive modules)")
+    loadtest.add_argument('--runs', type=int, default=1, help="runs per module")
+    loadtest.add_argument('--concurrency', type=int, default=1, help="parallel framework instances")
+    loadtest.add_argument('--max-results', type=int, default=1000, help="default:max_results for each run")
+    loadtest.add_argument('--min-interval', type=float, default=0.0, help="client api:min_interval in seconds")
+    loadtest.add_argument('--export', choices=('csv', 'csv.gz', 'parquet'), help="also stream runs through the exporter")
+    loadtest.add_argument('--workdir', default='loadtest', help="directory for module copies, results, ledgers and rollups")
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        state = StandinState(args.seed, args.total, args.latency / 1000, args.jitter / 1000,
+                             args.error_rate, args.rate_limit, host_miss_rate=args.host_miss_rate)
+        server = start_server(state, args.host, args.port)
+        print(f"[+] Shodan stand-in listening on http://{args.host}:{server.server_address[1]}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"\n[+] Served {state.requests} requests ({state.limited} rate limited, {state.errors} errors)")
+            server.shutdown()
+        return 0
+    return run_loadtest(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
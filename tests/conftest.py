@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dark_shodan import DarkShodan
+from shodan_standin import StandinState, start_server
+
+
+@pytest.fixture
+def standin():
+    """Start stand-in servers on demand and shut them down after the test"""
+    servers = []
+
+    def start(**settings):
+        state = StandinState(**dict({'seed': 7, 'total': 250}, **settings))
+        server = start_server(state)
+        servers.append(server)
+        return state, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_framework(tmp_path, monkeypatch, standin):
+    """
+    Build a connected DarkShodan working entirely inside tmp_path.
+
+    The modules are copied into tmp_path so the JSON they save next to
+    their folder stays out of the checkout as well.
+    """
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(os.path.join(ROOT, 'eng.lng'), tmp_path)
+    shutil.copytree(os.path.join(ROOT, 'modules'), tmp_path / 'modules',
+                    ignore=shutil.ignore_patterns('__pycache__'))
+
+    def make(config=None, **settings):
+        state, base_url = standin(**settings)
+        with open(tmp_path / 'config.json', 'w', encoding='utf-8') as f:
+            json.dump(dict({
+                'language': 'eng',
+                'modules_path': str(tmp_path / 'modules'),
+                'results_dir': str(tmp_path / 'results'),
+                'api:base_url': base_url,
+                'api:min_interval': 0,
+            }, **(config or {})), f)
+        framework = DarkShodan()
+        framework.api_key = 'standin-test'
+        assert framework.connect()
+        return framework, state
+
+    return make
@@ -0,0 +1,219 @@
+import csv
+import gzip
+import os
+import time
+
+import pytest
+import shodan
+
+from dark_shodan import (HOST_FIELDS, CreditBudgetError, CreditLedger, ModuleIndex,
+                         ResultExporter, ResultTable, RollupStore)
+
+
+def run(framework, module_name, max_results=None):
+    if max_results is not None:
+        framework.config['default:max_results'] = max_results
+    framework.current_module = framework.modules[module_name]
+    framework.run_module()
+
+
+# Searching, pagination and errors
+
+def test_search_pages_and_large_limits(make_framework):
+    framework, state = make_framework()
+    assert len(framework.api.search('', page=3)['matches']) == 50
+    results = framework.api.search('', limit=250)
+    assert results['total'] == 250
+    assert len(results['matches']) == 250
+    assert framework.ledger.spent_today('direct') == 1 + 3
+
+
+def test_server_errors_and_rate_limits_count_as_failed(make_framework):
+    framework, state = make_framework(rate_limit=2)
+    time.sleep(1.1)
+    framework.api.search('a', limit=10)
+    framework.api.search('b', limit=10)
+    with pytest.raises(shodan.APIError):
+        framework.api.search('c', limit=10)
+    state.rate_limit = 0
+    state.error_rate = 1.0
+    with pytest.raises(shodan.APIError):
+        framework.api.search('d', limit=10)
+    assert (framework.api.succeeded, framework.api.failed) == (2, 2)
+    assert state.limited == 1 and state.errors == 1
+
+
+def test_failed_run_leaves_rollups_untouched(make_framework):
+    framework, state = make_framework(total=30)
+    state.error_rate = 1.0
+    run(framework, 'blue_iris')
+    assert framework.rollups.load()['modules'] == {}
+
+
+# Credit ledger
+
+def test_module_run_fills_table_and_books_credits(make_framework):
+    framework, state = make_framework(total=1000)
+    run(framework, 'blue_iris', 120)
+    assert len(framework.result_table) == 120
+    assert framework.result_source == 'blue_iris'
+    assert framework.ledger.spent_today('blue_iris') == 2
+
+
+def test_run_budget_blocks_run_and_keeps_previous_results(make_framework):
+    framework, state = make_framework()
+    run(framework, 'blue_iris')
+    requests = state.requests
+    framework.ledger.run_budget = 1
+    run(framework, 'octoprint', 500)
+    assert state.requests == requests
+    assert framework.result_source == 'blue_iris'
+    assert len(framework.last_results) == 50
+
+
+def test_daily_budget_refuses_search(make_framework):
+    framework, state = make_framework()
+    framework.ledger.daily_budget = 2
+    framework.api.search('', limit=200)
+    with pytest.raises(CreditBudgetError):
+        framework.api.search('', limit=10)
+    assert framework.api.blocked == 1
+
+
+def test_stale_balance_is_reconciled_before_search(make_framework):
+    framework, state = make_framework()
+    key = CreditLedger.key_id('standin-test')
+    framework.ledger.data['keys'][key]['reconciled_at'] = 0
+    assert framework.ledger.balance('standin-test') is None
+    state.credits = 3
+    framework.ledger.run_budget = None
+    with pytest.raises(CreditBudgetError):
+        framework.api.search('', limit=500)
+    assert framework.ledger.balance('standin-test') == 3
+
+
+def test_ledger_prunes_old_days_and_flushes(tmp_path):
+    ledger = CreditLedger(str(tmp_path / 'ledger.json'), days_retention=30)
+    ledger.data['days']['2000-01-01'] = {'old': 5}
+    ledger.record('key', 2)
+    ledger.flush()
+    saved = CreditLedger(str(tmp_path / 'ledger.json'))
+    assert list(saved.data['days']) == [CreditLedger.today()]
+
+
+# Rollups
+
+def host(ip, country='Germany'):
+    return {'ip_str': ip, 'port': 80, 'location': {'country_name': country}}
+
+
+def test_rollups_track_new_and_resolved_hosts(tmp_path):
+    store = RollupStore(str(tmp_path / 'rollups.json'))
+    assert store.update('m', [host('1.1.1.1'), host('2.2.2.2', 'Japan')]) == (2, 0)
+    assert store.update('m', [host('2.2.2.2', 'Japan'), host('3.3.3.3')]) == (1, 1)
+    assert store.update('m', [host('4.4.4.4')], partial=True) is None
+    reopened = RollupStore(str(tmp_path / 'rollups.json'))
+    assert reopened.data is None
+    (key, active, new, resolved, partial), = reopened.series('m')
+    assert (new, resolved, partial) == (3, 1, 1)
+    assert reopened.series('m', country='Germany')[0][2:4] == (2, 1)
+    assert reopened.update('m', [host('2.2.2.2'), host('3.3.3.3')]) == (0, 0)
+
+
+def test_module_run_uses_search_total_for_rollups(make_framework):
+    framework, state = make_framework()
+    run(framework, 'blue_iris')
+    bucket = framework.rollups.series('blue_iris')[-1]
+    total = state.total_for('title:"blue iris remote view"')
+    assert bucket[1] == total and bucket[4] == 1
+    run(framework, 'blue_iris', 1000)
+    assert framework.rollups.series('blue_iris')[-1][2] == total
+
+
+# Module index and reload
+
+def test_module_index_ranks_exact_and_misspelled_terms(make_framework):
+    framework, state = make_framework()
+    assert framework.module_index.search('mongodb')[0].startswith('mongodb')
+    assert framework.module_index.search('octoprnt')[0] == 'octoprint'
+    index = ModuleIndex.build(framework.modules)
+    assert index.search('webcams canon')[0] == 'canon_webcams'
+
+
+MODULE = '''
+class {name}:
+    def __init__(self):
+        self.name = "{title}"
+        self.description = "test module"
+
+    def execute(self, api, query="", max_results=50):
+        return []
+'''
+
+
+def test_reload_tracks_added_changed_broken_and_deleted_files(make_framework, tmp_path):
+    framework, state = make_framework()
+    path = tmp_path / 'modules' / 'probe.py'
+    path.write_text(MODULE.format(name='probe', title='first'))
+    assert framework.reload_modules(quiet=True) == (0, 1, 0)
+    assert framework.reload_modules(quiet=True) == (0, 0, 0)
+
+    path.write_text(MODULE.format(name='probe', title='second'))
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert framework.reload_modules(quiet=True) == (1, 0, 0)
+    assert framework.modules['probe'].name == 'second'
+
+    path.write_text('raise RuntimeError("broken")')
+    os.utime(path, (time.time() + 20, time.time() + 20))
+    assert framework.reload_modules(quiet=True) == (0, 0, 0)
+    assert framework.modules['probe'].name == 'second'
+    assert 'broken' in framework.module_files[str(path)]['error']
+
+    path.unlink()
+    assert framework.reload_modules(quiet=True) == (0, 0, 1)
+    assert 'probe' not in framework.modules
+
+
+# Result table and exporter
+
+def test_result_table_keeps_ipv6_apart():
+    table = ResultTable.from_records([host('10.0.0.1'), host('2001:db8::1'), host('1.2.3.4')])
+    assert [table.ip(r) for r in table.sort('ip')] == ['1.2.3.4', '10.0.0.1', '2001:db8::1']
+    assert [table.ip(r) for r in table.where('ip', '<', '5.0.0.0')] == ['1.2.3.4']
+    assert [table.ip(r) for r in table.where('ip', '>', '::1')] == ['2001:db8::1']
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz'])
+def test_csv_export_uses_host_schema(make_framework, tmp_path, fmt):
+    framework, state = make_framework()
+    framework.last_results = framework.api.search('', limit=120)['matches']
+    path = tmp_path / f"export.{fmt}"
+    framework.export_results(fmt, str(path))
+    opener = gzip.open if fmt == 'csv.gz' else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert tuple(rows[0]) == HOST_FIELDS
+    assert len(rows) == 121
+
+
+def test_parquet_export_schema(tmp_path):
+    pyarrow = pytest.importorskip('pyarrow.parquet')
+    exporter = ResultExporter(str(tmp_path / 'hosts.parquet'), 'parquet', row_group_size=2)
+    exporter.write_many([host('1.1.1.1'), host('2.2.2.2'), host('3.3.3.3')])
+    assert exporter.close() == 3
+    schema = pyarrow.read_schema(str(tmp_path / 'hosts.parquet'))
+    assert tuple(schema.names) == HOST_FIELDS
+    assert str(schema.field('port').type) == 'uint16'
+
+
+# Enrichment
+
+def test_enrich_caches_hosts_and_misses(make_framework):
+    framework, state = make_framework({'enrich:batch_size': 5}, host_miss_rate=0.3)
+    run(framework, 'blue_iris', 20)
+    framework.enrich_results()
+    enriched = sum('enrichment' in record for record in framework.last_results)
+    assert 0 < enriched < 20
+    requests = state.requests
+    framework.enrich_results()
+    assert state.requests == requests